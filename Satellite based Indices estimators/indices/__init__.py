@@ -0,0 +1,5 @@
+"""Shared analyzer infrastructure for the Sentinel-2 index estimators."""
+
+from .base import ConfigurationError, IndexAnalyzer, fill_gaps, whittaker_smooth
+
+__all__ = ['ConfigurationError', 'IndexAnalyzer', 'fill_gaps', 'whittaker_smooth']